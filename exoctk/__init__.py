@@ -4,16 +4,34 @@
 The Exoplanet Characterization Tool Kit is a collection of packages used to reduce and analyze observations of transiting exoplanets
 """
 
+import importlib
 import os
+import sys
 
-from . import modelgrid
-from . import references
-from . import utils
-from . import contam_visibility
-from . import groups_integrations
-from . import limb_darkening
-from . import phase_constraint_overlap
-from . import lightcurve_fitting
+# Subpackages are only imported when first accessed
+_LAZY = ['modelgrid', 'references', 'utils', 'contam_visibility', 'groups_integrations',
+         'limb_darkening', 'phase_constraint_overlap', 'lightcurve_fitting']
+
+
+def __getattr__(name):
+    """Import a subpackage on first access (PEP 562)"""
+    if name in _LAZY:
+        module = importlib.import_module('.' + name, __name__)
+        globals()[name] = module
+        return module
+
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+
+def __dir__():
+    """Include the not yet imported subpackages"""
+    return sorted(set(globals()) | set(_LAZY))
+
+
+# Module-level __getattr__ needs Python 3.7+ so import everything up front otherwise
+if sys.version_info < (3, 7):
+    for _name in _LAZY:
+        __getattr__(_name)
 
 try:
     setup_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'setup.py')
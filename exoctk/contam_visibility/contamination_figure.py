@@ -225,11 +225,17 @@ def contam(cube, instrument, targetName='noName', paRange=[0, 360],
     lam_file = os.path.join(TRACES_PATH, 'NIRISS', 'lambda_order1-2.txt')
     ypix, lamO1, lamO2 = np.loadtxt(lam_file, unpack=True)
 
-    nPA, rows, cols = cube.shape[0], cube.shape[1], cube.shape[2]
-
     PAmin, PAmax = paRange[0], paRange[1]
     PA = np.arange(PAmin, PAmax, 1)
 
+    # Only process the neighbor frames of the requested PA range, which
+    # follow the target trace frames (orders 1 & 2 for NIRISS)
+    nTarg = 2 if instrument == 'NIRISS' else 1
+    if PA.size != cube.shape[0] - nTarg:
+        cube = np.concatenate([cube[:nTarg], cube[nTarg + PAmin:nTarg + PAmax]])
+
+    nPA, rows, cols = cube.shape[0], cube.shape[1], cube.shape[2]
+
     # Generate the contam figure
     if instrument == 'NIRISS':
         contamO1, contamO2 = nirissContam(cube)
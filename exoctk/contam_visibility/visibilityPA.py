@@ -203,14 +203,14 @@ def fill_between(fig, xdata, pamin, pamax, **kwargs):
     # addressing NIRSpec issue
 
     # now creating the patches for the arrays
-    nanbot = np.where([np.isnan(i) for i in pamin])[0]
-    nantop = np.where([np.isnan(i) for i in pamax])[0]
+    nanbot = np.flatnonzero(np.isnan(pamin))
+    nantop = np.flatnonzero(np.isnan(pamax))
     yb = np.split(pamin, nanbot)
     xs = np.split(xdata, nanbot)
     yt = np.split(pamax, nantop)
     for x, bot, top in zip(xs, yb, yt):
-        x = np.append(x, x[::-1])
-        y = np.append(bot, top[::-1])
+        x = np.concatenate((x, x[::-1]))
+        y = np.concatenate((bot, top[::-1]))
         fig.patch(x, y, **kwargs)
     return fig
 
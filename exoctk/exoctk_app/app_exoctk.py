@@ -1,4 +1,5 @@
-from functools import wraps
+import copy
+from functools import lru_cache, wraps
 import os
 import json
 from pkg_resources import resource_filename
@@ -53,6 +54,74 @@ try:
 except IOError:
     DB = None
 
+# The inline Bokeh resources only depend on the Bokeh version
+INLINE_JS = INLINE.render_js()
+INLINE_CSS = INLINE.render_css()
+
+# The pandeia saturation values for the groups and integrations form
+with open(resource_filename('exoctk', 'data/groups_integrations/groups_integrations_input_data.json')) as f:
+    SAT_DATA = json.load(f)['fullwell']
+
+# Let browsers revalidate the static data downloads for a day
+DOWNLOAD_CACHE_TIMEOUT = 86400
+
+
+@lru_cache(maxsize=None)
+def _filter_wave_range(filter_name):
+    """Get the wavelength range of an SVO filter, loading each filter only once
+
+    Parameters
+    ----------
+    filter_name: str
+        The name of the filter
+
+    Returns
+    -------
+    tuple
+        The minimum and maximum wavelength of the filter
+    """
+    bandpass = svo.Filter(filter_name)
+
+    return bandpass.wave_min.value, bandpass.wave_max.value
+
+
+@lru_cache(maxsize=4)
+def _load_model_grid(modeldir):
+    """Load the model grid in the given directory once per directory
+
+    Parameters
+    ----------
+    modeldir: str
+        The path to the model grid directory
+
+    Returns
+    -------
+    exoctk.modelgrid.ModelGrid
+        The shared model grid, which should be copied before it is modified
+    """
+    return ModelGrid(modeldir, resolution=500)
+
+
+def _html_table(table):
+    """Render a table as a single striped HTML table element
+
+    Parameters
+    ----------
+    table: astropy.table.Table
+        The table to render
+
+    Returns
+    -------
+    str
+        The HTML table element
+    """
+    html = StringIO()
+    table.write(html, format='ascii.html', htmldict={'table_id': 'myTable', 'table_class': 'table table-striped table-hover'})
+    html = html.getvalue()
+
+    # Strip the surrounding document
+    return html[html.index('<table'):html.rindex('</table>') + len('</table>')]
+
 
 # Redirect to the index
 @app_exoctk.route('/')
@@ -95,19 +164,16 @@ def limb_darkening():
     # Reload page with appropriate filter data
     if form.filter_submit.data:
 
-        kwargs = {}
+        # Get the filter wavelength range
         if form.bandpass.data == 'tophat':
-            kwargs['n_bins'] = 1
-            kwargs['pixels_per_bin'] = 100
-            kwargs['wave_min'] = 1 * u.um
-            kwargs['wave_max'] = 2 * u.um
-
-        # Get the filter
-        bandpass = svo.Filter(form.bandpass.data, **kwargs)
+            kwargs = {'n_bins': 1, 'pixels_per_bin': 100, 'wave_min': 1 * u.um, 'wave_max': 2 * u.um}
+            bandpass = svo.Filter(form.bandpass.data, **kwargs)
+            wave_rng = bandpass.wave_min.value, bandpass.wave_max.value
+        else:
+            wave_rng = _filter_wave_range(form.bandpass.data)
 
         # Update the form data
-        form.wave_min.data = bandpass.wave_min.value
-        form.wave_max.data = bandpass.wave_max.value
+        form.wave_min.data, form.wave_max.data = wave_rng
 
         # Send it back to the main page
         return render_template('limb_darkening.html', form=form)
@@ -116,7 +182,7 @@ def limb_darkening():
     if form.modelgrid_submit.data:
 
         # Load the modelgrid
-        mg = ModelGrid(form.modeldir.data, resolution=500)
+        mg = _load_model_grid(form.modeldir.data)
         teff_rng = mg.Teff_vals.min(), mg.Teff_vals.max()
         logg_rng = mg.logg_vals.min(), mg.logg_vals.max()
         feh_rng = mg.FeH_vals.min(), mg.FeH_vals.max()
@@ -148,7 +214,7 @@ def limb_darkening():
             pass
 
         # Load the model grid
-        model_grid = ModelGrid(form.modeldir.data, resolution=500)
+        model_grid = copy.copy(_load_model_grid(form.modeldir.data))
         form.modeldir.data = [j for i, j in form.modeldir.choices if i == form.modeldir.data][0]
 
         # Grism details
@@ -160,18 +226,17 @@ def limb_darkening():
         bk_plot = bandpass.plot(draw=False)
         bk_plot.plot_width = 580
         bk_plot.plot_height = 280
-        js_resources = INLINE.render_js()
-        css_resources = INLINE.render_css()
+        js_resources = INLINE_JS
+        css_resources = INLINE_CSS
         filt_script, filt_plot = components(bk_plot)
 
         # Trim the grid to nearby grid points to speed up calculation
         # full_rng = [model_grid.Teff_vals, model_grid.logg_vals, model_grid.FeH_vals]
         # trim_rng = find_closest(full_rng, star_params, n=1, values=True)
 
-        # Calculate the coefficients for each profile
+        # Calculate the coefficients for each profile, interpolating the grid only once
         ld = lf.LDC(model_grid)
-        for prof in form.profiles.data:
-            ld.calculate(*star_params, prof, mu_min=float(form.mu_min.data), bandpass=bandpass)
+        ld.calculate(*star_params, form.profiles.data, mu_min=float(form.mu_min.data), bandpass=bandpass)
 
         # Draw tabbed figure
         final = ld.plot_tabs()
@@ -184,24 +249,32 @@ def limb_darkening():
         print_table = ld.results[[col for col in keep_cols if col in ld.results.colnames]]
         file_as_string = '\n'.join(print_table.pformat(max_lines=-1, max_width=-1))
 
+        # Index the result rows of each profile in one pass
+        # (the column holds bytes, so compare the decoded strings)
+        profile_col = np.char.decode(np.asarray(ld.results['profile']))
+        profile_rows = {profile: np.flatnonzero(profile_col == profile) for profile in form.profiles.data}
+
+        # The coefficient and error columns, e.g. 'c1' and 'e1'
+        coeff_cols = [c for c in ld.results.colnames if len(c) == 2 and c[0] in 'ce']
+
         # Make a table for each profile with a row for each wavelength bin
         profile_tables = []
         for profile in form.profiles.data:
 
             # Make LaTeX for polynomials
             latex = lf.ld_profile(profile, latex=True)
-            poly = '\({}\)'.format(latex).replace('*', '\cdot').replace('\e', 'e')
+            poly = '\({}\)'.format(latex).replace('*', '\cdot')
 
             # Make the table into LaTeX
-            table = filter_table(ld.results, profile=profile)
-            co_cols = [c for c in ld.results.colnames if (c.startswith('c') or c.startswith('e')) and len(c) == 2 and not np.all([np.isnan(i) for i in table[c]])]
+            table = ld.results[profile_rows[profile]]
+            co_cols = [c for c in coeff_cols if not np.isnan(table[c]).all()]
             table = table[['wave_eff', 'wave_min', 'wave_max'] + co_cols]
             table.rename_column('wave_eff', '\(\lambda_\mbox{eff}\hspace{5px}(\mu m)\)')
             table.rename_column('wave_min', '\(\lambda_\mbox{min}\hspace{5px}(\mu m)\)')
             table.rename_column('wave_max', '\(\lambda_\mbox{max}\hspace{5px}(\mu m)\)')
 
             # Add the results to the lists
-            html_table = '\n'.join(table.pformat(max_width=-1, max_lines=-1, html=True)).replace('<table', '<table id="myTable" class="table table-striped table-hover"')
+            html_table = _html_table(table)
 
             # Add the table title
             header = '<br></br><strong>{}</strong><br><p>\(I(\mu)/I(\mu=1)\) = {}</p>'.format(profile, poly)
@@ -211,7 +284,7 @@ def limb_darkening():
 
         return render_template('limb_darkening_results.html', form=form,
                                table=profile_tables, script=script, plot=div,
-                               file_as_string=repr(file_as_string),
+                               file_as_string=file_as_string,
                                filt_plot=filt_plot, filt_script=filt_script,
                                js=js_resources, css=css_resources)
 
@@ -229,10 +302,6 @@ def limb_darkening_error():
 def groups_integrations():
     """The groups and integrations calculator form page"""
 
-    # Print out pandeia sat values
-    with open(resource_filename('exoctk', 'data/groups_integrations/groups_integrations_input_data.json')) as f:
-        sat_data = json.load(f)['fullwell']
-
     # Load default form
     form = fv.GroupsIntsForm()
 
@@ -259,7 +328,7 @@ def groups_integrations():
             else:
                 err = 'The Transit Duration from ExoMAST experienced some issues. Try a different spelling or source.'
                 return render_template('groups_integrations_error.html', err=err)
-        return render_template('groups_integrations.html', form=form, sat_data=sat_data)
+        return render_template('groups_integrations.html', form=form, sat_data=SAT_DATA)
 
     # Reload page with stellar data from ExoMAST
     if form.resolve_submit.data:
@@ -308,24 +377,24 @@ def groups_integrations():
                 form.targname.errors = ["Sorry, could not resolve '{}' in exoMAST.".format(form.targname.data)]
 
         # Send it back to the main page
-        return render_template('groups_integrations.html', form=form, sat_data=sat_data)
+        return render_template('groups_integrations.html', form=form, sat_data=SAT_DATA)
 
     if form.validate_on_submit() and form.calculate_submit.data:
 
-        # Get the form data
+        # Get the form data, converting the validated Decimal fields to floats once
         ins = form.ins.data
         params = {'ins': ins,
-                  'mag': form.kmag.data,
-                  'obs_time': form.obs_duration.data,
-                  'sat_max': form.sat_max.data,
+                  'mag': float(form.kmag.data),
+                  'obs_time': float(form.obs_duration.data),
+                  'sat_max': float(form.sat_max.data),
                   'sat_mode': form.sat_mode.data,
                   'time_unit': form.time_unit.data,
                   'band': 'K',
                   'mod': form.mod.data,
-                  'filt'.format(ins): getattr(form, '{}_filt'.format(ins)).data,
-                  'subarray'.format(ins): getattr(form, '{}_subarray'.format(ins)).data,
-                  'filt_ta'.format(ins): getattr(form, '{}_filt_ta'.format(ins)).data,
-                  'subarray_ta'.format(ins): getattr(form, '{}_subarray_ta'.format(ins)).data}
+                  'filt': getattr(form, f'{ins}_filt').data,
+                  'subarray': getattr(form, f'{ins}_subarray').data,
+                  'filt_ta': getattr(form, f'{ins}_filt_ta').data,
+                  'subarray_ta': getattr(form, f'{ins}_subarray_ta').data}
 
         # Get ngroups
         params['n_group'] = 'optimize' if form.n_group.data == 0 else int(form.n_group.data)
@@ -381,7 +450,7 @@ def groups_integrations():
             err = results
             return render_template('groups_integrations_error.html', err=err)
 
-    return render_template('groups_integrations.html', form=form, sat_data=sat_data)
+    return render_template('groups_integrations.html', form=form, sat_data=SAT_DATA)
 
 
 @app_exoctk.route('/contam_visibility', methods=['GET', 'POST'])
@@ -466,8 +535,8 @@ def contam_visibility():
             visib_table = fh.getvalue()
 
             # Get scripts
-            vis_js = INLINE.render_js()
-            vis_css = INLINE.render_css()
+            vis_js = INLINE_JS
+            vis_css = INLINE_CSS
             vis_script, vis_div = components(vis_plot)
 
             # Contamination plot too
@@ -484,8 +553,8 @@ def contam_visibility():
                 contam_plot = cf.contam(contam_cube, form.inst.data, targetName=str(title), paRange=[int(form.pa_min.data), int(form.pa_max.data)], badPAs=badPAs, fig='bokeh')
 
                 # Get scripts
-                contam_js = INLINE.render_js()
-                contam_css = INLINE.render_css()
+                contam_js = INLINE_JS
+                contam_css = INLINE_CSS
                 contam_script, contam_div = components(contam_plot)
 
             else:
@@ -539,7 +608,8 @@ def save_contam_pdf():
 def exoctk_savefile():
     """Save results to file"""
 
-    file_as_string = eval(request.form['file_as_string'])
+    # Browsers submit textarea line breaks as CRLF
+    file_as_string = request.form['file_as_string'].replace('\r\n', '\n')
 
     response = make_response(file_as_string)
     response.headers["Content-type"] = 'text; charset=utf-8'
@@ -581,8 +651,8 @@ def fortney():
 
     table_string = fh.getvalue()
 
-    js_resources = INLINE.render_js()
-    css_resources = INLINE.render_css()
+    js_resources = INLINE_JS
+    css_resources = INLINE_CSS
 
     script, div = components(fig)
 
@@ -611,8 +681,8 @@ def generic():
     table_string = fh.getvalue()
 
     # Web-ify bokeh plot
-    js_resources = INLINE.render_js()
-    css_resources = INLINE.render_css()
+    js_resources = INLINE_JS
+    css_resources = INLINE_CSS
 
     script, div = components(fig)
 
@@ -649,7 +719,7 @@ def save_generic_result():
 def groups_integrations_download():
     """Download the groups and integrations calculator data"""
 
-    return send_file(resource_filename('exoctk', 'data/groups_integrations/groups_integrations_input_data.json'), mimetype="text/json", attachment_filename='groups_integrations_input_data.json', as_attachment=True)
+    return send_file(resource_filename('exoctk', 'data/groups_integrations/groups_integrations_input_data.json'), mimetype="text/json", attachment_filename='groups_integrations_input_data.json', as_attachment=True, conditional=True, cache_timeout=DOWNLOAD_CACHE_TIMEOUT)
 
 
 @app_exoctk.route('/fortney_download')
@@ -657,7 +727,7 @@ def fortney_download():
     """Download the fortney grid data"""
 
     fortney_data = os.path.join(get_env_variables()['fortgrid_dir'], 'fortney_grid.db')
-    return send_file(fortney_data, attachment_filename='fortney_grid.db', as_attachment=True)
+    return send_file(fortney_data, attachment_filename='fortney_grid.db', as_attachment=True, conditional=True, cache_timeout=DOWNLOAD_CACHE_TIMEOUT)
 
 
 def check_auth(username, password):
@@ -18,27 +18,86 @@ with a provided list or arguments.
 """
 
 ## -- IMPORTS
+from functools import lru_cache
 import os
+import sqlite3
 
 import astropy.constants as constants
 from astropy.extern.six.moves import StringIO
 import astropy.table as at
 import astropy.units as u
-from bokeh.resources import INLINE
-from bokeh.util.string import encode_utf8
-from bokeh.embed import components
-from bokeh.models import Range1d
-from bokeh.models.widgets import Panel, Tabs
 from bokeh.plotting import figure, output_file, save
 import h5py
 import numpy as np
-import pandas as pd
-from sqlalchemy import create_engine
 
 from exoctk.utils import get_env_variables
 
+# All fortney models have fixed 1.25 Jupiter radii
+FORTNEY_RADIUS_KM = (1.25 * u.R_jup).to(u.km).value
+
 ## -- FUNCTIONS
 
+@lru_cache(maxsize=None)
+def _fortney_db(db_path):
+    """Open a read-only connection to the Fortney Grid database once per path
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the Fortney Grid sqlite database.
+
+    Returns
+    -------
+    sqlite3.Connection
+        The (shared) connection to the database.
+    """
+    if not os.path.isfile(db_path):
+        raise IOError('{} does not exist'.format(db_path))
+
+    return sqlite3.connect('file:{}?mode=ro'.format(db_path), uri=True, check_same_thread=False)
+
+
+@lru_cache(maxsize=None)
+def _read_fortney_header(db):
+    """Read the Fortney Grid header table into numpy arrays, once per connection
+
+    Parameters
+    ----------
+    db : sqlite3.Connection
+        The connection to the Fortney Grid database.
+
+    Returns
+    -------
+    dict
+        The gravity, temp, noTiO, ray, flat and name columns of the header.
+    """
+    columns = ['gravity', 'temp', 'noTiO', 'ray', 'flat', 'name']
+    rows = db.execute('SELECT {} FROM header ORDER BY rowid'.format(', '.join(columns))).fetchall()
+
+    return {col: np.array(vals) for col, vals in zip(columns, zip(*rows))}
+
+
+def _read_fortney_model(db, name):
+    """Read the wavelength and radius columns of a Fortney Grid model
+
+    Parameters
+    ----------
+    db : sqlite3.Connection
+        The connection to the Fortney Grid database.
+    name : str
+        The name of the model table.
+
+    Returns
+    -------
+    wavelength, radius : np.ndarray
+        The model wavelength and radius arrays.
+    """
+    rows = db.execute('SELECT wavelength, radius FROM "{}" ORDER BY rowid'.format(name)).fetchall()
+    wavelength, radius = np.array(rows, dtype=np.float64).reshape(-1, 2).T
+
+    return wavelength, radius
+
+
 def fortney_grid(args, write_plot=False, write_table=False):
     """
     Function to grab a Fortney Grid model, plot it, and make a table.
@@ -72,17 +131,17 @@ def fortney_grid(args, write_plot=False, write_table=False):
     """
 
     # Check for Fortney Grid database
-    print(os.path.join(get_env_variables()['exoctk_data'], 'fortney/fortney_models.db'))
+    db_path = os.path.join(get_env_variables()['exoctk_data'], 'fortney/fortney_models.db')
+    print(db_path)
     try:
-        db = create_engine('sqlite:///' +
-                os.path.join(get_env_variables()['exoctk_data'], 'fortney/fortney_models.db'))
-        header = pd.read_sql_table('header', db)
-    except:
+        db = _fortney_db(db_path)
+        header = _read_fortney_header(db)
+    except (IOError, sqlite3.Error):
         raise Exception('Fortney Grid File Path is incorrect, or not initialized')
 
     if args:
         rstar = float(args['rstar'])
-        rstar = (rstar * u.Unit(args['rstar_unit'])).to(u.km)
+        rstar_km = (rstar * u.Unit(args['rstar_unit'])).to(u.km).value
         reference_radius = float(args['reference_radius'])
         rplan = (reference_radius * u.Unit(args['r_unit'])).to(u.km)
         temp = float(args['temp'])
@@ -114,15 +173,11 @@ def fortney_grid(args, write_plot=False, write_table=False):
 
         fort_grav = 25.0 * u.m / u.s**2
 
-        df = header.loc[(header.gravity == fort_grav) & (header.temp == temp) &
-                        (header.noTiO == noTiO) & (header.ray == ray) &
-                        (header.flat == flat)]
-
-        wave_planet = np.array(pd.read_sql_table(df['name'].values[0], db)['wavelength'])[::-1]
-        r_lambda = np.array(pd.read_sql_table(df['name'].values[0], db)['radius']) * u.km
+        match = (header['gravity'] == fort_grav.value) & (header['temp'] == temp) & \
+                (header['noTiO'] == noTiO) & (header['ray'] == ray) & \
+                (header['flat'] == flat)
 
-        # All fortney models have fixed 1.25 radii
-        z_lambda = r_lambda - (1.25 * u.R_jup).to(u.km)
+        wave_planet, r_lambda = _read_fortney_model(db, header['name'][match][0])
 
         # Scale with planetary mass
         pmass = float(args['pmass'])
@@ -130,24 +185,21 @@ def fortney_grid(args, write_plot=False, write_table=False):
 
         # Convert radius to m for gravity units
         gravity = constants.G * (mass) / (rplan.to(u.m))**2.0
+        g_ratio = (fort_grav / gravity).decompose().value
 
-        # Scale lambbda (this technically ignores the fact that scaleheight
-        # is altitude dependent) therefore, it will not be valide for very
-        # very low gravities
-        z_lambda = z_lambda * fort_grav / gravity
-
-        # Create new wavelength dependent R based on scaled ravity
-        r_lambda = z_lambda + rplan
-
-        # Finally compute (rp/r*)^2
-        flux_planet = np.array(r_lambda**2 / rstar**2)
+        # Scale the altitude above the fixed model radius with gravity (this
+        # technically ignores the fact that scaleheight is altitude dependent)
+        # therefore, it will not be valide for very very low gravities. Then
+        # create the new wavelength dependent R and compute (rp/r*)^2, all on
+        # plain float arrays in km
+        flux_planet = ((r_lambda - FORTNEY_RADIUS_KM) * g_ratio + rplan.value)**2 / rstar_km**2
 
-        x = wave_planet
+        x = wave_planet[::-1]
         y = flux_planet[::-1]
 
     else:
-        df = pd.read_sql_table('t1000g25_noTiO', db)
-        x, y = df['wavelength'], df['radius']**2.0 / 7e5**2.0
+        x, radius = _read_fortney_model(db, 't1000g25_noTiO')
+        y = radius**2.0 / 7e5**2.0
 
     tab = at.Table(data=[x, y])
     fh = StringIO()
@@ -166,7 +218,7 @@ def fortney_grid(args, write_plot=False, write_table=False):
         save(fig)
 
     # Return temperature list for the fortney grid page
-    temp_out = list(map(str, header.temp.unique()))
+    temp_out = list(map(str, dict.fromkeys(header['temp'])))
 
     return fig, fh, temp_out
 
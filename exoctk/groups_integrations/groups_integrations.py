@@ -25,6 +25,7 @@ import json
 import math
 import os
 from decimal import Decimal
+from functools import lru_cache
 
 from astropy.io import ascii
 import numpy as np
@@ -33,6 +34,27 @@ from scipy.integrate import quad
 
 ## -- FUNCTIONS
 
+@lru_cache(maxsize=None)
+def load_input_data(infile):
+    """
+    Loads the precalculated pandeia data once per file. The returned
+    dictionary is shared between calls and must not be modified.
+
+    Parameters
+    ----------
+    infile : str
+        The path to the data file.
+
+    Returns
+    -------
+    dat : dict
+        The parsed data file.
+    """
+
+    with open(infile) as f:
+        return json.load(f)
+
+
 def calc_groups_from_exp_time(max_exptime_per_int, t_frame):
     """
     Given the maximum saturation time, calculates the number
@@ -249,8 +271,7 @@ def convert_sat(sat_max, sat_mode, ins, infile, ta=False):
         The fullwell to use in counts.
     """
 
-    with open(infile) as f:
-        dat = json.load(f)
+    dat = load_input_data(infile)
 
     ins_dict = dat['fullwell'] 
     
@@ -298,8 +319,7 @@ def interpolate_from_dat(mag, ins, filt, sub, mod, band, t_frame, sat_lvl, infil
         The maximum saturation level reached by that number of groups.
     """
     # Create the dictionaries for each filter and select out the prerun data
-    with open(infile) as f:
-        dat = json.load(f)
+    dat = load_input_data(infile)
 
     ta_or_sci = 'sci_sat'
 
@@ -402,13 +422,11 @@ def min_groups(mag, ins, filt, sub, mod, band, infile):
         The minimum number of groups to reach target snr.
     """
 
-    with open(infile) as f:
-        dat = json.load(f)
+    dat = load_input_data(infile)
 
-    # Match to closest magnitude
-    mags = [float(i) for i in dat['mags']]
-    closest_mag = min(mags, key=lambda x:abs(x-float(mag)))
-    index = mags.index(closest_mag)
+    # Match to closest magnitude, parsing the given one only once
+    mags = np.array(dat['mags'], dtype=float)
+    index = np.abs(mags - float(mag)).argmin()
 
     # Match to data 
     min_groups = dat['ta_snr'][ins][filt][sub][mod][index]
@@ -609,8 +627,7 @@ def set_t_frame(infile, ins, sub, ta=False):
     """
     
     # Read in dict with frame times
-    with open(infile) as f:
-        frame_time = json.load(f)['frame_time']
+    frame_time = load_input_data(infile)['frame_time']
 
     if ta:
         t_frame = frame_time[ins]['ta'][sub]
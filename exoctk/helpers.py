@@ -3,16 +3,46 @@
 """
 A module for helpful code snippets
 """
+from functools import lru_cache, partial
 from glob import glob
+import io
+import multiprocessing
 import os
+import re
 from pkg_resources import resource_filename
 from shutil import copyfile
 
-from astropy.io import fits, ascii
+from astropy.io import fits
 import astropy.constants as ac
 import astropy.units as q
+import h5py
 import numpy as np
 
+try:
+    import fitsio
+except ImportError:
+    fitsio = None
+
+# Keywords fitsio writes itself from the data
+FITSIO_RESERVED = re.compile(r'^(SIMPLE|BITPIX|NAXIS\d*|EXTEND|XTENSION|PCOUNT|GCOUNT|TFIELDS|TTYPE\d+|TFORM\d+|EXTNAME)$')
+
+# Fixed column widths of the ATLAS9 intensity tables, i.e. the wavelength
+# and absolute I(mu=1) (F9.2,1PE10.3) followed by the I(mu)/I(mu=1) ratios (I6)
+ATLAS9_WAVE_WIDTH = 9
+ATLAS9_I1_WIDTH = 10
+ATLAS9_COL_WIDTH = 6
+
+# Parses the Teff, log(g), Fe/H, vturb, and mixing length tokens of an ATLAS9 'TEFF' line
+ATLAS9_HEADER = re.compile(r'\s*TEFF\s+(?P<teff>[^\s.]+)\S*\s+\S+\s+(?P<logg>\S{1,3})\S*\s+\S+\s+\S+\s+'
+                           r'\[?(?P<feh>[^\s\[\]]+)\]?\s+\S+\s+(?P<vturb>\S+)\s+\S+\s+\S+\s+(?P<xlen>\S+)')
+
+# Converts ATLAS9 intensities in [erg/cm2/s/hz/ster] to [erg/s/cm2/cm]
+# when divided by the squared wavelength in [A]
+ATLAS9_FLUX_CONV = (q.erg/q.cm**2/q.s/q.steradian/q.Hz*ac.c*q.steradian/q.cm**2).to(q.erg/q.s/q.cm**3).value*1E16
+
+# The FITS template loaded in each conversion worker
+_TEMPLATE_HDU = None
+
 def external_files():
     """
     A snippet to propagate the external files directory
@@ -29,7 +59,400 @@ def external_files():
 
     return metadata.get('external_files')
 
-def convert_ATLAS9(filepath, destination='', template=resource_filename('ExoCTK', 'data/core/ModelGrid_tmp.fits')):
+@lru_cache()
+def _column_widths(n_mu):
+    """
+    The fixed column widths of an ATLAS9 data line
+
+    Parameters
+    ----------
+    n_mu: int
+        The number of mu columns
+
+    Returns
+    -------
+    tuple
+        The width of the wavelength and I(mu=1) columns followed by the
+        width of each remaining intensity ratio column
+    """
+    return (ATLAS9_WAVE_WIDTH, ATLAS9_I1_WIDTH)+(ATLAS9_COL_WIDTH,)*(n_mu-1)
+
+def _parse_fixed_width(lines, widths):
+    """
+    Parse fixed-width numeric lines into a 2D float array with one row per column
+
+    The lines are packed into a single byte buffer and viewed as a
+    structured array with one string field per column, so each column
+    is converted to float in one vectorized call. Blank or malformed
+    fields raise a ValueError
+
+    Parameters
+    ----------
+    lines: sequence
+        The lines to parse
+    widths: sequence
+        The width of each column
+
+    Returns
+    -------
+    np.ndarray
+        The parsed values with shape (len(widths), len(lines))
+    """
+    rowlen = sum(widths)
+    dtype = np.dtype([('f{}'.format(n), 'S{}'.format(w)) for n, w in enumerate(widths)])
+    buf = ''.join(l.rstrip('\n').ljust(rowlen)[:rowlen] for l in lines).encode('ascii')
+    fields = np.frombuffer(buf, dtype=dtype)
+
+    data = np.empty((len(widths), len(lines)))
+    for n, name in enumerate(dtype.names):
+        data[n] = fields[name].astype(float)
+
+    return data
+
+def _write_fitsio(filepath, hdulist):
+    """
+    Write an astropy HDUList to file using the cfitsio-backed fitsio package
+
+    Parameters
+    ----------
+    filepath: str
+        The path to the new FITS file
+    hdulist: astropy.io.fits.HDUList
+        The HDUs to write
+    """
+    with fitsio.FITS(filepath, 'rw', clobber=True) as fz:
+        for n, hdu in enumerate(hdulist):
+
+            # Carry over all non-structural header cards
+            header = [{'name': c.keyword, 'value': c.value, 'comment': c.comment}
+                      for c in hdu.header.cards if not FITSIO_RESERVED.match(c.keyword)]
+
+            # The primary HDU has no EXTNAME
+            extname = None if n == 0 else hdu.name
+            fz.write(np.asarray(hdu.data), header=header, extname=extname)
+
+def _parse_block(header, lines):
+    """
+    Parse a single (Teff, log(g)) block of an ATLAS9 file
+
+    Parameters
+    ----------
+    header: str
+        The 'TEFF' line that opens the block
+    lines: list
+        The lines of the block following the header
+
+    Returns
+    -------
+    dict
+        The block parameters and its mu, float32 wavelength [A], and
+        float32 flux [erg/s/cm2/cm] arrays
+    """
+    # Get the parameters
+    h = ATLAS9_HEADER.match(header)
+    if h is None:
+        raise ValueError("Could not parse ATLAS9 header '{}'".format(header.strip()))
+    teff = int(h.group('teff'))
+    logg = float(h.group('logg'))
+    vturb = float(h.group('vturb'))
+    xlen = float(h.group('xlen'))
+    feh = float(h.group('feh'))
+
+    # Get the mu values and parse the fixed-width data in one pass
+    mu = np.fromstring(lines[1], sep=' ')
+    data = _parse_fixed_width(lines[2:-4], _column_widths(len(mu)))
+
+    # Put intensity array for increasing mu values in a cube without copying
+    data_cube = data[:0:-1]
+
+    # Scale the flux values by the flux(mu=1) value
+    data_cube[:-1] *= data_cube[-1]
+    data_cube[-1] *= 1E5
+
+    # Increasing mu values
+    mu = mu[::-1]
+
+    # Get the wavelength and convert from nm to A
+    wave = data[0]*q.nm.to(q.AA)
+
+    # Convert the flux from [erg/cm2/s/hz/ster] to [erg/s/cm2/cm]
+    # by multiplying by c/lambda**2 in place
+    data_cube *= ATLAS9_FLUX_CONV/wave**2
+
+    # Store in single precision, which is well below the ATLAS9 precision
+    return {'teff': teff, 'logg': logg, 'feh': feh, 'vturb': vturb, 'xlen': xlen,
+            'mu': mu, 'wave': wave.astype(np.float32), 'flux': data_cube.astype(np.float32)}
+
+def _block_labels(logg, feh):
+    """
+    The log(g) and Fe/H labels used in ATLAS9 file and extension names
+
+    Parameters
+    ----------
+    logg: float
+        The surface gravity of the block
+    feh: float
+        The metallicity of the block
+
+    Returns
+    -------
+    tuple
+        The log(g) and Fe/H labels, e.g. ('45', 'm05')
+    """
+    logg_txt = f'{abs(int(logg*10.)):02d}'
+    feh_txt = f"{'m' if feh<0 else 'p'}{abs(int(feh*10.)):02d}"
+
+    return logg_txt, feh_txt
+
+def _set_block_keys(hdr, block):
+    """
+    Write the parameters of an ATLAS9 block to a FITS header
+
+    Parameters
+    ----------
+    hdr: astropy.io.fits.Header
+        The header to update
+    block: dict
+        The parsed block returned by _parse_block
+    """
+    hdr['PHXTEFF'] = block['teff']
+    hdr['PHXLOGG'] = block['logg']
+    hdr['PHXM_H'] = block['feh']
+    hdr['PHXXI_L'] = block['vturb']
+    hdr['PHXXI_M'] = block['vturb']
+    hdr['PHXXI_N'] = block['vturb']
+    hdr['PHXEOS'] = 'ATLAS9'
+    hdr['PHXMXLEN'] = block['xlen']
+    hdr['PHXREFF'] = '-'
+    hdr['PHXBUILD'] = '-'
+    hdr['PHXVER'] = '-'
+    hdr['DATE'] = '-'
+    hdr['PHXMASS'] = '-'
+    hdr['PHXLUM'] = '-'
+    hdr['CRVAL1'] = '-'
+    hdr['CDELT1'] = '-'
+    hdr['COMMENT'] = 'ATLAS9 flux and wavelength stored as float32 (BITPIX=-32)'
+
+def _emit_block(block, destination, template):
+    """
+    Write a single parsed ATLAS9 block to its own FITS file
+
+    Parameters
+    ----------
+    block: dict
+        The parsed block returned by _parse_block
+    destination: str
+        The destination for the split files
+    template: astropy.io.fits.HDUList
+        The FITS template returned by _read_template
+    """
+    # Name the new file
+    logg_txt, feh_txt = _block_labels(block['logg'], block['feh'])
+    new_file = f"{destination}ATLAS9_{block['teff']}_{logg_txt}_{feh_txt}.fits"
+
+    # Build fresh HDUs around the template headers and abundances
+    HDU = fits.HDUList([fits.PrimaryHDU(block['flux'], header=template[0].header.copy()),
+                        fits.ImageHDU(block['mu'], header=template[1].header.copy()),
+                        template[2].copy()])
+
+    # Write the new key/values
+    _set_block_keys(HDU[0].header, block)
+
+    # Create a WAVELENGTH extension
+    ext = fits.ImageHDU(block['wave'], name='WAVELENGTH')
+    HDU.append(ext)
+
+    # Write the new file with cfitsio if available...
+    if fitsio is not None:
+        _write_fitsio(new_file, HDU)
+
+    # ...or in one go with astropy
+    else:
+        buf = io.BytesIO()
+        HDU.writeto(buf)
+        with open(new_file, 'wb') as f:
+            f.write(buf.getvalue())
+
+def _write_single_file(blocks, filepath):
+    """
+    Write all parsed ATLAS9 blocks to one multi-extension FITS file
+
+    The file holds one flux ImageHDU per block, named e.g. 'T4000_G45_M05',
+    followed by the MU and WAVELENGTH arrays shared by all blocks and an
+    INDEX table mapping (teff, logg, feh) to the extension of each block
+
+    Parameters
+    ----------
+    blocks: sequence
+        The parsed blocks returned by _parse_block
+    filepath: str
+        The path to the new FITS file
+    """
+    hdus = [fits.PrimaryHDU()]
+    hdus[0].header['PHXEOS'] = 'ATLAS9'
+
+    # Add an extension for each block
+    index = []
+    for block in blocks:
+        logg_txt, feh_txt = _block_labels(block['logg'], block['feh'])
+        ext = fits.ImageHDU(block['flux'], name=f"T{block['teff']}_G{logg_txt}_{feh_txt}")
+        _set_block_keys(ext.header, block)
+        hdus.append(ext)
+        index.append((block['teff'], block['logg'], block['feh'], len(hdus)-1))
+
+    # ATLAS9 blocks share the same mu and wavelength grids
+    hdus.append(fits.ImageHDU(blocks[0]['mu'], name='MU'))
+    hdus.append(fits.ImageHDU(blocks[0]['wave'], name='WAVELENGTH'))
+
+    # Add the lookup table
+    teff, logg, feh, ext_index = zip(*index)
+    cols = [fits.Column(name='teff', format='J', array=teff),
+            fits.Column(name='logg', format='E', array=logg),
+            fits.Column(name='feh', format='E', array=feh),
+            fits.Column(name='ext_index', format='J', array=ext_index)]
+    hdus.append(fits.BinTableHDU.from_columns(cols, name='INDEX'))
+
+    fits.HDUList(hdus).writeto(filepath, overwrite=True)
+
+def _write_hdf5(blocks, filepath):
+    """
+    Write all parsed ATLAS9 blocks to one HDF5 file
+
+    Like the ModelGrid flux file, the 'flux' dataset has shape
+    (Teff, log(g), Fe/H, mu, wavelength) and 'mu' has shape
+    (Teff, log(g), Fe/H, mu). Each grid point is stored as one chunk
+    and missing grid points are filled with NaNs. The axis values are
+    stored in the 'Teff', 'logg', 'FeH', and 'wave' datasets
+
+    Parameters
+    ----------
+    blocks: sequence
+        The parsed blocks returned by _parse_block
+    filepath: str
+        The path to the new HDF5 file
+    """
+    # Get the grid axes
+    T = np.unique([block['teff'] for block in blocks])
+    G = np.unique([block['logg'] for block in blocks])
+    M = np.unique([block['feh'] for block in blocks])
+    n_mu, n_wave = blocks[0]['flux'].shape
+    shp = (len(T), len(G), len(M))
+
+    with h5py.File(filepath, 'w') as f:
+        flux = f.create_dataset('flux', shape=shp+(n_mu, n_wave), chunks=(1, 1, 1, n_mu, n_wave),
+                                dtype=blocks[0]['flux'].dtype, compression='lzf', fillvalue=np.nan)
+        mu = f.create_dataset('mu', shape=shp+(n_mu,), dtype=float, fillvalue=np.nan)
+
+        # Write each block at its grid point
+        for block in blocks:
+            idx = (np.searchsorted(T, block['teff']), np.searchsorted(G, block['logg']), np.searchsorted(M, block['feh']))
+            flux[idx] = block['flux']
+            mu[idx] = block['mu']
+
+        # Store the axes
+        f.create_dataset('Teff', data=T)
+        f.create_dataset('logg', data=G)
+        f.create_dataset('FeH', data=M)
+        f.create_dataset('wave', data=blocks[0]['wave'])
+
+def _iter_blocks(f):
+    """
+    Stream an ATLAS9 file one (Teff, log(g)) block at a time
+
+    Parameters
+    ----------
+    f: file
+        The open ATLAS9 file
+
+    Yields
+    ------
+    tuple
+        The 'TEFF' header line and the list of lines that follow it
+    """
+    block_header = None
+    current_block = []
+    for l in f:
+
+        # A new chunk starts so flush the previous one
+        if l.startswith('TEFF'):
+            if block_header is not None:
+                yield block_header, current_block
+            block_header = l
+            current_block = []
+
+        elif block_header is not None:
+            current_block.append(l)
+
+    # Flush the last chunk
+    if block_header is not None:
+        yield block_header, current_block
+
+def _read_template(template):
+    """
+    Read the FITS template headers and abundance table without
+    loading the template's flux and mu arrays
+
+    Parameters
+    ----------
+    template: str
+        The path to the FITS template file to use
+
+    Returns
+    -------
+    astropy.io.fits.HDUList
+        The header-only primary and MU HDUs and the ABUNDANCES table
+    """
+    with fits.open(template, lazy_load_hdus=True) as hdulist:
+        hdus = [fits.PrimaryHDU(header=hdulist[0].header.copy()),
+                fits.ImageHDU(header=hdulist[1].header.copy()),
+                hdulist[2].copy()]
+
+    return fits.HDUList(hdus)
+
+def _load_template(template_bytes):
+    """
+    Load a private copy of the FITS template into a worker process
+
+    Parameters
+    ----------
+    template_bytes: bytes
+        The serialized template returned by _read_template
+    """
+    global _TEMPLATE_HDU
+    _TEMPLATE_HDU = fits.HDUList.fromstring(template_bytes)
+
+def _convert_block(raw_block, destination='', return_block=False):
+    """
+    Convert a single ATLAS9 block using the worker's template
+
+    Parameters
+    ----------
+    raw_block: tuple
+        The 'TEFF' line that opens the block and the list of lines
+        following it, as yielded by _iter_blocks
+    destination: str
+        The destination for the split files
+    return_block: bool
+        Return the parsed block instead of writing it to its own file
+
+    Returns
+    -------
+    dict
+        The parsed block if return_block is True
+    """
+    try:
+        block = _parse_block(*raw_block)
+
+        if return_block:
+            return block
+
+        _emit_block(block, destination, _TEMPLATE_HDU)
+
+    # Skip malformed blocks
+    except (ValueError, IndexError):
+        pass
+
+def convert_ATLAS9(filepath, destination='', template=resource_filename('exoctk', 'data/core/ModelGrid_tmp.fits'), processes=None, single_file=False, hdf5=False):
     """
     Split ATLAS9 FITS files into separate files containing one Teff, log(g), and Fe/H
     
@@ -45,107 +468,36 @@ def convert_ATLAS9(filepath, destination='', template=resource_filename('ExoCTK'
         The destination for the split files
     template: str
         The path to the FITS template file to use
-    """        
-    # Get all the data
-    L = open(filepath, encoding='utf-8').readlines()
-    
-    # Get the indexes of each log(g) chunk
-    start = []
-    for idx,l in enumerate(L):
-        if l.startswith('TEFF'):
-            start.append(idx)
-            
-    # Break up into chunks
-    for n,idx in enumerate(start):
-        
-        try:
-        
-            # Get the parameters
-            h = L[idx].strip().split()
-            teff = int(h[1].split('.')[0])
-            logg = float(h[3][:3])
-            vturb = float(h[8])
-            xlen = float(h[11])
-            feh = float(h[6].replace('[','').replace(']',''))
-            
-            # Parse the data
-            try:
-                end = start[n+1]
-            except:
-                end = -1
-            data = L[idx+3:end-4]
-            
-            # Fix column spacing
-            for n,l in enumerate(data):
-                data[n] = l[:19]+' '+' '.join([l[idx:idx+6] for idx in np.arange(19,len(l),6)])
-                
-            # Get cols and data
-            cols = ['wl']+L[idx+2].strip().split()
-            data = ascii.read(data, names=cols)
-            
-            # Put intensity array for increasing mu values in a cube
-            data_cube = np.array([data[cols][n] for n in cols[1:]])[::-1]
-            
-            # Scale the flux values by the flux(mu=1) value
-            data_cube[:-1] *= data_cube[-1]
-            data_cube[-1] *= 1E5
-            
-            # Apply units
-            data_cube = data_cube*q.erg/q.cm**2/q.s/q.steradian/q.Hz
-            
-            # mu values
-            mu = list(map(float,cols[1:]))[::-1]
-            
-            # Get the wavelength and convert from nm to A
-            wave = np.array(data['wl'])*q.nm.to(q.AA)
-            
-            # Convert the flux from [erg/cm2/s/hz/ster] to [erg*m/cm**2/Hz/s**2/sr]
-            # by multiplying by c/lambda**2
-            data_cube = data_cube*ac.c/(wave**2)
-            
-            # Convert [m/sr] to [cm-1]
-            data_cube = data_cube*q.steradian/q.cm**2
-            
-            # Convert to [erg/s/cm2/cm]
-            data_cube = data_cube.to(q.erg/q.s/q.cm**3)*1E16
-            
-            # Copy the old HDU list
-            logg_txt = str(abs(int(logg*10.))).zfill(2)
-            feh_txt = '{}{}'.format('m' if feh<0 else 'p', str(abs(int(feh*10.))).zfill(2))
-            new_file = destination+'ATLAS9_{}_{}_{}.fits'.format(teff,logg_txt,feh_txt)
-            HDU = fits.open(template)
-            
-            # Write the new data
-            HDU[0].data = data_cube.value
-            HDU[1].data = mu
-            
-            # Write the new key/values
-            HDU[0].header['PHXTEFF'] = teff
-            HDU[0].header['PHXLOGG'] = logg
-            HDU[0].header['PHXM_H'] = feh
-            HDU[0].header['PHXXI_L'] = vturb
-            HDU[0].header['PHXXI_M'] = vturb
-            HDU[0].header['PHXXI_N'] = vturb
-            HDU[0].header['PHXEOS'] = 'ATLAS9'
-            HDU[0].header['PHXMXLEN'] = xlen
-            HDU[0].header['PHXREFF'] = '-'
-            HDU[0].header['PHXBUILD'] = '-'
-            HDU[0].header['PHXVER'] = '-'
-            HDU[0].header['DATE'] = '-'
-            HDU[0].header['PHXMASS'] = '-'
-            HDU[0].header['PHXLUM'] = '-'
-            HDU[0].header['CRVAL1'] = '-'
-            HDU[0].header['CDELT1'] = '-'
-            
-            # Create a WAVELENGTH extension
-            ext = fits.ImageHDU(wave)
-            ext.update_ext_name('WAVELENGTH')
-            HDU.append(ext)
-            
-            # Write the new file
-            fits.HDUList(HDU).writeto(new_file, clobber=True)
-            
-            HDU.close()
-            
-        except:
-            pass
+    processes: int (optional)
+        The number of worker processes, defaulting to the number of CPUs
+    single_file: bool
+        Write all blocks to one multi-extension FITS file with an INDEX
+        table instead of one file per Teff, log(g), and Fe/H
+    hdf5: bool
+        Write all blocks to one HDF5 file holding a flux hypercube with
+        shape (Teff, log(g), Fe/H, mu, wavelength), chunked by grid point
+    """
+    # Read the template from disk once and stage it in memory for the workers
+    buf = io.BytesIO()
+    _read_template(template).writeto(buf)
+
+    func = partial(_convert_block, destination=destination, return_block=single_file or hdf5)
+    with open(filepath, encoding='utf-8') as f:
+
+        # Let the kernel read ahead aggressively since the file is streamed once
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+        # Convert the chunks in parallel as they are read, loading the
+        # template once per worker. Only the parsed blocks that are bundled
+        # are kept
+        with multiprocessing.Pool(processes, initializer=_load_template, initargs=(buf.getvalue(),)) as pool:
+            blocks = [block for block in pool.imap(func, _iter_blocks(f), chunksize=4) if block is not None]
+
+    # Bundle the blocks into one file
+    if single_file or hdf5:
+        name = destination+'ATLAS9_{}'.format(os.path.splitext(os.path.basename(filepath))[0])
+        if blocks and single_file:
+            _write_single_file(blocks, name+'.fits')
+        if blocks and hdf5:
+            _write_hdf5(blocks, name+'.hdf5')
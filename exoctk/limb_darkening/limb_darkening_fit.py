@@ -4,33 +4,83 @@
 A module to calculate limb darkening coefficients from a grid of model spectra
 """
 import copy
-import inspect
 import os
+import sys
 import warnings
 
 from astropy.io import ascii as ii
 import astropy.table as at
 import astropy.units as q
 from astropy.utils.exceptions import AstropyWarning
-import matplotlib
-import matplotlib.pyplot as plt
-from matplotlib import rc
 import numpy as np
-from scipy.optimize import curve_fit
 from svo_filters import svo
 import bokeh.plotting as bkp
-from bokeh.models import Range1d
+from bokeh.models import ColumnDataSource, Range1d
 from bokeh.models.widgets import Panel, Tabs
 
 from .. import utils
 from .. import modelgrid
 
-rc('font', **{'family': 'sans-serif', 'sans-serif': ['Helvetica'], 'size': 16})
-rc('text', usetex=True)
-
 warnings.simplefilter('ignore', category=AstropyWarning)
 warnings.simplefilter('ignore', category=FutureWarning)
 
+# Default plot color for each limb darkening profile
+LD_COLORS = {'quadratic': 'blue', '4-parameter': 'red', 'exponential': 'green', 'linear': 'orange', 'square-root': 'cyan', '3-parameter': 'magenta', 'logarithmic': 'pink', 'uniform': 'purple'}
+
+
+def _ld_uniform(m, c1):
+    """Uniform limb darkening profile"""
+    return c1
+
+
+def _ld_linear(m, c1):
+    """Linear limb darkening profile"""
+    return 1. - c1 * (1. - m)
+
+
+def _ld_quadratic(m, c1, c2):
+    """Quadratic limb darkening profile"""
+    return 1. - c1 * (1. - m) - c2 * (1. - m)**2
+
+
+def _ld_square_root(m, c1, c2):
+    """Square-root limb darkening profile"""
+    return 1. - c1 * (1. - m) - c2 * (1. - np.sqrt(m))
+
+
+def _ld_logarithmic(m, c1, c2):
+    """Logarithmic limb darkening profile"""
+    return 1. - c1 * (1. - m) - c2 * m * np.log(m)
+
+
+def _ld_exponential(m, c1, c2):
+    """Exponential limb darkening profile"""
+    return 1. - c1 * (1. - m) - c2 / (1. - np.exp(m))
+
+
+def _ld_3param(m, c1, c2, c3):
+    """3-parameter limb darkening profile"""
+    return 1. - c1 * (1. - m) - c2 * (1. - m**1.5) - c3 * (1. - m**2)
+
+
+def _ld_4param(m, c1, c2, c3, c4):
+    """4-parameter limb darkening profile"""
+    return 1. - c1 * (1. - m**0.5) - c2 * (1. - m) - c3 * (1. - m**1.5) - c4 * (1. - m**2)
+
+
+# Supported profiles a la BATMAN
+_LD_PROFILES = {'uniform': _ld_uniform, 'linear': _ld_linear, 'quadratic': _ld_quadratic, 'square-root': _ld_square_root, 'logarithmic': _ld_logarithmic, 'exponential': _ld_exponential, '3-parameter': _ld_3param, '4-parameter': _ld_4param}
+
+# LaTeX formatted expressions of the profiles
+_LD_LATEX = {'uniform': r'c1',
+             'linear': r'1.-c1*(1.-\mu)',
+             'quadratic': r'1.-c1*(1.-\mu)-c2*(1.-\mu)^2',
+             'square-root': r'1.-c1*(1.-\mu)-c2*(1.-\sqrt(\mu))',
+             'logarithmic': r'1.-c1*(1.-\mu)-c2*\mu*\log(\mu)',
+             'exponential': r'1.-c1*(1.-\mu)-c2/(1.-e^\mu)',
+             '3-parameter': r'1.-c1*(1.-\mu)-c2*(1.-\mu^{1.5})-c3*(1.-\mu^2)',
+             '4-parameter': r'1.-c1*(1.-\mu^{0.5})-c2*(1.-\mu)-c3*(1.-\mu^{1.5})-c4*(1.-\mu^2)'}
+
 
 def ld_profile(name='quadratic', latex=False):
     """
@@ -55,66 +105,162 @@ def ld_profile(name='quadratic', latex=False):
         The corresponding function for the given profile
 
     """
-    # Supported profiles a la BATMAN
-    names = ['uniform', 'linear', 'quadratic', 'square-root', 'logarithmic', 'exponential', '3-parameter', '4-parameter']
-
     # Check that the profile is supported
-    if name in names:
-
-        # Uniform
-        if name == 'uniform':
-            def profile(m, c1):
-                return c1
-
-        # Linear
-        if name == 'linear':
-            def profile(m, c1):
-                return 1. - c1 * (1. - m)
-
-        # Quadratic
-        if name == 'quadratic':
-            def profile(m, c1, c2):
-                return 1. - c1 * (1. - m) - c2 * (1. - m)**2
-
-        # Square-root
-        if name == 'square-root':
-            def profile(m, c1, c2):
-                return 1. - c1 * (1. - m) - c2 * (1. - np.sqrt(m))
-
-        # Logarithmic
-        if name == 'logarithmic':
-            def profile(m, c1, c2):
-                return 1. - c1 * (1. - m) - c2 * m * np.log(m)
-
-        # Exponential
-        if name == 'exponential':
-            def profile(m, c1, c2):
-                return 1. - c1 * (1. - m) - c2 / (1. - np.e**m)
-
-        # 3-parameter
-        if name == '3-parameter':
-            def profile(m, c1, c2, c3):
-                return 1. - c1 * (1. - m) - c2 * (1. - m**1.5) - c3 * (1. - m**2)
-
-        # 4-parameter
-        if name == '4-parameter':
-            def profile(m, c1, c2, c3, c4):
-                return 1. - c1 * (1. - m**0.5) - c2 * (1. - m) - c3 * (1. - m**1.5) - c4 * (1. - m**2)
+    if name in _LD_PROFILES:
+        profile = _LD_PROFILES[name]
 
         if latex:
-            profile = inspect.getsource(profile).replace('\n', '')
-            profile = profile.replace('\\', '').split('return ')[1]
-
-            for i, j in [('**', '^'), ('m', '\mu'), (' ', ''), ('np.', '\\'), ('0.5', '{0.5}'), ('1.5', '{1.5}')]:
-                profile = profile.replace(i, j)
+            profile = _LD_LATEX[name]
 
         return profile
 
     else:
-        print("'{}' is not a supported profile. Try".format(name), names)
+        print("'{}' is not a supported profile. Try".format(name), list(_LD_PROFILES))
         return
 
 
+def _is_mpl_figure(fig):
+    """
+    Check if a figure is a matplotlib figure. matplotlib is only needed for
+    plotting, so it is not imported here if nothing has imported it yet
+
+    Parameters
+    ----------
+    fig: object
+        The figure to check
+
+    Returns
+    -------
+    bool
+        True for a matplotlib figure
+    """
+    mpl_figure = sys.modules.get('matplotlib.figure')
+
+    return mpl_figure is not None and isinstance(fig, mpl_figure.Figure)
+
+
+def _atleast_nd(arr, ndim):
+    """
+    Prepend length-one axes to an array up to the given number of
+    dimensions
+
+    Parameters
+    ----------
+    arr: array-like
+        The array
+    ndim: int
+        The number of dimensions
+
+    Returns
+    -------
+    np.ndarray
+        The C-contiguous array, so reductions over the last axis stream
+        through memory
+    """
+    arr = np.asarray(arr)
+
+    return np.ascontiguousarray(arr.reshape((1,) * (ndim - arr.ndim) + arr.shape))
+
+
+def _design_matrix(ldfunc, mu):
+    """
+    Build the linear least-squares design matrix of a limb darkening
+    profile. All of the supported profiles are linear in their
+    coefficients, i.e. f(mu, c) = f(mu, 0) + X(mu) @ c
+
+    Parameters
+    ----------
+    ldfunc: function
+        The limb darkening profile function
+    mu: sequence
+        The mu values
+
+    Returns
+    -------
+    tuple
+        The design matrix X of shape (len(mu), n_coeffs) and the offset
+        f(mu, 0)
+    """
+    mu = np.asarray(mu, dtype=float)
+    n_coeffs = ldfunc.__code__.co_argcount - 1
+
+    # Evaluate the profile at zero and at each unit coefficient vector
+    offset = np.broadcast_to(ldfunc(mu, *np.zeros(n_coeffs)), mu.shape)
+    cols = [ldfunc(mu, *unit) - offset for unit in np.eye(n_coeffs)]
+    X = np.column_stack([np.broadcast_to(col, mu.shape) for col in cols])
+
+    return X, offset
+
+
+class _LDBasis:
+    """
+    A limb darkening profile precomputed at fixed mu values, so that it can
+    be evaluated for any number of coefficient sets with a single matrix
+    product instead of recomputing the powers of mu each time
+    """
+    def __init__(self, ldfunc, mu):
+        """
+        Parameters
+        ----------
+        ldfunc: function
+            The limb darkening profile function
+        mu: sequence
+            The mu values
+        """
+        self.mu = np.asarray(mu, dtype=float)
+        self.X, self.offset = _design_matrix(ldfunc, self.mu)
+
+    def apply(self, coeffs):
+        """
+        Evaluate the profile at the basis mu values
+
+        Parameters
+        ----------
+        coeffs: sequence
+            The coefficients, of shape (n_coeffs,) or (n_sets, n_coeffs)
+
+        Returns
+        -------
+        np.ndarray
+            The profile values, of shape (n_mu,) or (n_sets, n_mu)
+        """
+        return self.offset + np.asarray(coeffs, dtype=float) @ self.X.T
+
+
+def _fit_linear(X, y):
+    """
+    Fit a model that is linear in its coefficients by least squares
+
+    Parameters
+    ----------
+    X: np.ndarray
+        The design matrix of shape (n_points, n_coeffs)
+    y: np.ndarray
+        The data to fit of shape (n_points,), or (n_points, n_fits) to
+        fit several data sets with the same design matrix at once
+
+    Returns
+    -------
+    tuple
+        The best fit coefficients of shape (n_coeffs,) or
+        (n_coeffs, n_fits) and their covariance matrices of shape
+        (n_coeffs, n_coeffs) or (n_fits, n_coeffs, n_coeffs)
+    """
+    if not np.all(np.isfinite(y)):
+        raise ValueError("Data to fit must not contain infs or NaNs")
+
+    coeffs, rss, rank, sv = np.linalg.lstsq(X, y, rcond=None)
+
+    # Scale the covariance by the reduced chi-squared, like curve_fit
+    n_points, n_coeffs = X.shape
+    resid = y - X @ coeffs
+    dof = n_points - n_coeffs
+    s_sq = np.sum(resid**2, axis=0) / dof if dof > 0 else np.full(np.shape(y)[1:], np.inf)
+    cov = np.linalg.pinv(X.T @ X) * np.asarray(s_sq)[..., None, None]
+
+    return coeffs, cov
+
+
 class LDC:
     """A class to hold all the LDCs you want to run
 
@@ -155,12 +301,12 @@ class LDC:
         dtypes = ['|S20', float, float, float, '|S20', '|S20', '|S20', object, object, object, np.float16, np.float16, np.float16, object, object, np.float16, object, object, np.float16, object, object, object, '|S20']
         self.results = at.Table(names=columns, dtype=dtypes)
 
-        self.ld_color = {'quadratic': 'blue', '4-parameter': 'red', 'exponential': 'green', 'linear': 'orange', 'square-root': 'cyan', '3-parameter': 'magenta', 'logarithmic': 'pink', 'uniform': 'purple'}
+        self.ld_color = dict(LD_COLORS)
 
         self.count = 1
 
     @staticmethod
-    def bootstrap_errors(mu_vals, func, coeffs, errors, n_samples=1000):
+    def bootstrap_errors(mu_vals, func, coeffs, errors, n_samples=1000, basis=None, rng=None):
         """
         Bootstrapping LDC errors
 
@@ -169,31 +315,82 @@ class LDC:
         mu_vals: sequence
             The mu values
         func: callable
-            The LD profile function
+            The LD profile function, called as func(mu, *coeffs)
         coeffs: sequence
             The coefficients
         errors: sequence
             The errors on each coeff
         n_samples: int
             The number of samples
+        basis: _LDBasis (optional)
+            The profile precomputed at mu_vals
+        rng: numpy.random.Generator (optional)
+            The random number generator to draw the samples with
 
         Returns
         -------
         tuple
             The lower and upper errors
         """
-        # Generate n_samples
-        vals = []
-        for n in range(n_samples):
-            co = np.random.normal(coeffs, errors)
-            vals.append(func(mu_vals, *co))
+        # Draw all n_samples coefficient sets at once
+        if rng is None:
+            rng = np.random.default_rng()
+        samples = rng.normal(coeffs, errors, size=(n_samples, len(coeffs)))
+
+        # Evaluate the profile for every sample at once, with samples
+        # along the first axis and mu along the second. The supported
+        # profiles are linear in their coefficients so they can use the
+        # precomputed basis, but any other function is called directly
+        if basis is None and func in _LD_PROFILES.values():
+            basis = _LDBasis(func, mu_vals)
+
+        if basis is not None:
+            vals = basis.apply(samples)
+        else:
+            mu_vals = np.asarray(mu_vals, dtype=float)
+            vals = func(mu_vals[None, :], *samples.T[:, :, None])
+            vals = np.broadcast_to(vals, (n_samples, mu_vals.size))
 
-        # r = np.array(list(zip(*vals)))
-        dn_err = np.min(np.asarray(vals), axis=0)
-        up_err = np.max(np.asarray(vals), axis=0)
+        dn_err = vals.min(axis=0)
+        up_err = vals.max(axis=0)
 
         return dn_err, up_err
 
+    @staticmethod
+    def propagated_errors(mu_vals, func, coeffs, errors, n_sigma=1, basis=None):
+        """
+        Analytic LDC errors. Every supported profile is linear in its
+        coefficients, so the uncertainty of the profile follows directly
+        from the design matrix without any sampling
+
+        Parameters
+        ----------
+        mu_vals: sequence
+            The mu values
+        func: callable
+            The LD profile function
+        coeffs: sequence
+            The coefficients, of shape (n_coeffs,) or (n_sets, n_coeffs)
+        errors: sequence
+            The (independent) errors on each coeff, of the same shape
+        n_sigma: float
+            The width of the error band in standard deviations
+        basis: _LDBasis (optional)
+            The profile precomputed at mu_vals
+
+        Returns
+        -------
+        tuple
+            The lower and upper errors
+        """
+        if basis is None:
+            basis = _LDBasis(func, mu_vals)
+
+        vals = basis.apply(coeffs)
+        sigma = np.sqrt(np.asarray(errors, dtype=float)**2 @ (basis.X**2).T)
+
+        return vals - n_sigma * sigma, vals + n_sigma * sigma
+
     def calculate(self, Teff, logg, FeH, profile, mu_min=0.05, ld_min=0.01,
                   bandpass=None, name=None, color=None, **kwargs):
         """
@@ -212,10 +409,11 @@ class LDC:
             The logarithm of the surface gravity
         FeH: float
             The logarithm of the metallicity
-        profile: str
+        profile: str, sequence
             The name of the limb darkening profile function to use,
             including 'uniform', 'linear', 'quadratic', 'square-root',
-            'logarithmic', 'exponential', and '4-parameter'
+            'logarithmic', 'exponential', and '4-parameter', or a list
+            of names to fit to the same model intensities
         mu_min: float
             The minimum mu value to consider
         ld_min: float
@@ -228,11 +426,13 @@ class LDC:
         color: str (optional)
             A color for the plotted result
         """
-        # Define the limb darkening profile function
-        ldfunc = ld_profile(profile)
+        # Define the limb darkening profile functions
+        profiles = [profile] if isinstance(profile, str) else list(profile)
+        ldfuncs = [ld_profile(prof) for prof in profiles]
 
-        if not ldfunc:
-            raise ValueError("No such LD profile:", profile)
+        for prof, ldfunc in zip(profiles, ldfuncs):
+            if not ldfunc:
+                raise ValueError("No such LD profile:", prof)
 
         # Get the grid point
         grid_point = self.model_grid.get(Teff, logg, FeH)
@@ -268,100 +468,154 @@ class LDC:
         except ValueError:
             flux = bandpass.apply([wave, flux])  # Sometimes it returns one value
 
-        # Make rsr curve 3 dimensions if there is only one
+        # Make rsr curve and flux 3 dimensions if there is only one
         # wavelength bin, then get wavelength only
-        bp = bandpass.rsr
-        if bp.ndim == 2:
-            bp = bp[None, :]
+        bp = _atleast_nd(bandpass.rsr, 3)
         wave = bp[:, 0, :]
+        flux = _atleast_nd(flux, 3)
 
         # Calculate mean intensity vs. mu
-        wave = wave[None, :] if wave.ndim == 1 else wave
-        flux = flux[None, :] if flux.ndim == 2 else flux
         mean_i = np.nanmean(flux, axis=-1)
-        mean_i[mean_i == 0] = np.nan
+        np.putmask(mean_i, mean_i == 0, np.nan)
 
         # Calculate limb darkening, I[mu]/I[1] vs. mu
-        ld = mean_i / mean_i[:, np.where(mu == max(mu))].squeeze(axis=-1)
+        ld = mean_i / mean_i[:, mu.argmax(), None]
 
         # Rescale mu values to make f(mu=0)=ld_min
         # for the case where spherical models extend beyond limb
         ld_avg = np.nanmean(ld, axis=0)
-        muz = np.interp(ld_min, ld_avg, mu) if any(ld_avg < ld_min) else 0
+        muz = np.interp(ld_min, ld_avg, mu) if (ld_avg < ld_min).any() else 0
         mu = (mu - muz) / (1 - muz)
 
         # Trim to useful mu range
         imu, = np.where(mu > mu_min)
         scaled_mu, scaled_ld = mu[imu], ld[:, imu]
 
-        # Fit limb darkening coefficients for each wavelength bin
-        for n, ldarr in enumerate(scaled_ld):
-
-            # Get effective wavelength of bin
-            wave_eff = bandpass.centers[0, n].round(5)
-
-            try:
-
-                # Fit polynomial to data
-                coeffs, cov = curve_fit(ldfunc, scaled_mu, ldarr, method='lm')
-
-                # Calculate errors from covariance matrix diagonal
-                errs = np.sqrt(np.diag(cov))
+        # Add any missing coefficient and error columns to the table
+        n_coeffs = max(ldfunc.__code__.co_argcount for ldfunc in ldfuncs) - 1
+        coeff_names = ['{}{}'.format(c, n + 1) for n in range(n_coeffs) for c in 'ce']
+        for cname in coeff_names:
+            if cname not in self.results.colnames:
+                self.results[cname] = np.full(len(self.results), np.nan)
+
+        # Fit each profile to the same intensities
+        new_rows = []
+        for profile, ldfunc in zip(profiles, ldfuncs):
+
+            # The design matrix is shared by all wavelength bins
+            basis = _LDBasis(ldfunc, scaled_mu)
+            X, offset = basis.X, basis.offset
+
+            # Fit the limb darkening coefficients of all the wavelength bins
+            # with finite intensities at once
+            good = np.isfinite(scaled_ld).all(axis=1)
+            coeffs_all = np.full((len(scaled_ld), X.shape[1]), np.nan)
+            errs_all = np.full((len(scaled_ld), X.shape[1]), np.nan)
+            if good.any():
+                coeffs_fit, cov = _fit_linear(X, (scaled_ld[good] - offset).T)
+                coeffs_all[good] = coeffs_fit.T
+
+                # Calculate errors from covariance matrix diagonals
+                errs_all[good] = np.sqrt(np.diagonal(cov, axis1=-2, axis2=-1))
+
+            # The results shared by every wavelength bin
+            base_row = {'color': color or self.ld_color[profile],
+                        'Teff': Teff, 'logg': logg, 'FeH': FeH,
+                        'filter': bandpass.filterID,
+                        'models': self.model_grid.path,
+                        'raw_mu': mu, 'scaled_mu': scaled_mu, 'mu_min': mu_min,
+                        'bandpass': bandpass, 'ldfunc': ldfunc,
+                        'profile': profile, 'n_bins': bandpass.n_bins,
+                        'pixels_per_bin': bandpass.pixels_per_bin}
+
+            # Round the table values of all the bins at once
+            centers = bandpass.centers[0]
+            wave_eff_all = centers.round(5)
+            wave_min_all = wave[:, 0].round(5)
+            wave_max_all = wave[:, -1].round(5)
+            coeffs_round = coeffs_all.round(3)
+            errs_round = errs_all.round(3)
+
+            # Add a result for each wavelength bin
+            for n, ldarr in enumerate(scaled_ld):
+
+                # Get effective wavelength of bin
+                wave_eff = wave_eff_all[n]
+
+                if not good[n]:
+                    print("Could not calculate coefficients at {}".format(wave_eff))
+                    continue
+
+                coeffs, errs = coeffs_all[n], errs_all[n]
 
                 # Make a dictionary or the results
-                result = {}
+                result = base_row.copy()
 
                 # Check the count
                 result['name'] = name or 'Calculation {}'.format(self.count)
                 self.count += 1
-                if len(bandpass.centers[0]) == len(scaled_ld) and name is None:
-                    result['name'] = '{} {}'.format(str(round(bandpass.centers[0][n], 2)), self.model_grid.wave_units)
-
-                # Set a color if possible
-                result['color'] = color or self.ld_color[profile]
-
-                # Add the results
-                result['Teff'] = Teff
-                result['logg'] = logg
-                result['FeH'] = FeH
-                result['filter'] = bandpass.filterID
-                result['models'] = self.model_grid.path
-                result['raw_mu'] = mu
+                if len(centers) == len(scaled_ld) and name is None:
+                    result['name'] = '{} {}'.format(str(round(centers[n], 2)), self.model_grid.wave_units)
+
+                # Add the results for this bin
                 result['raw_ld'] = ld[n]
-                result['scaled_mu'] = scaled_mu
                 result['scaled_ld'] = ldarr
                 result['flux'] = flux[n]
                 result['wave'] = wave[n]
-                result['mu_min'] = mu_min
-                result['bandpass'] = bandpass
-                result['ldfunc'] = ldfunc
                 result['coeffs'] = coeffs
                 result['errors'] = errs
-                result['profile'] = profile
-                result['n_bins'] = bandpass.n_bins
-                result['pixels_per_bin'] = bandpass.pixels_per_bin
-                result['wave_min'] = wave[n, 0].round(5)
+                result['wave_min'] = wave_min_all[n]
                 result['wave_eff'] = wave_eff
-                result['wave_max'] = wave[n, -1].round(5)
+                result['wave_max'] = wave_max_all[n]
 
                 # Add the coeffs
-                for n, (coeff, err) in enumerate(zip(coeffs, errs)):
-                    cname = 'c{}'.format(n + 1)
-                    ename = 'e{}'.format(n + 1)
-                    result[cname] = coeff.round(3)
-                    result[ename] = err.round(3)
+                result.update(zip(coeff_names[::2], coeffs_round[n]))
+                result.update(zip(coeff_names[1::2], errs_round[n]))
+
+                new_rows.append(result)
 
-                    # Add the coefficient column to the table if not present
-                    if cname not in self.results.colnames:
-                        self.results[cname] = [np.nan] * len(self.results)
-                        self.results[ename] = [np.nan] * len(self.results)
+        # Add the new rows to the table at once
+        if new_rows:
+            self.results = at.vstack([self.results, self._rows_table(new_rows)])
 
-                # Add the new row to the table
-                result = {i: j for i, j in result.items() if i in self.results.colnames}
-                self.results.add_row(result)
+    def _rows_table(self, rows):
+        """Make a table of result rows with the same columns as the results
+        table. Coefficients a profile does not have are NaN and any other
+        missing values are zero or empty strings
 
-            except ValueError:
-                print("Could not calculate coefficients at {}".format(wave_eff))
+        Parameters
+        ----------
+        rows: sequence
+            The result dictionaries
+
+        Returns
+        -------
+        astropy.table.Table
+            The table of rows
+        """
+        data = {}
+        for cname in self.results.colnames:
+            dtype = self.results[cname].dtype
+
+            # Fill object columns element-wise so equal length arrays are
+            # not stacked into a 2D column
+            if dtype == object:
+                vals = np.empty(len(rows), dtype=object)
+                for n, row in enumerate(rows):
+                    vals[n] = row.get(cname)
+
+            # Let numpy size string columns so long values are not cut to
+            # the current width, and vstack widens the table column
+            elif dtype.kind in 'SU':
+                vals = np.array([row.get(cname, '') for row in rows], dtype=dtype.kind)
+
+            else:
+                fill = np.nan if len(cname) == 2 and cname[0] in 'ce' else 0
+                vals = np.array([row.get(cname, fill) for row in rows], dtype=dtype)
+
+            data[cname] = vals
+
+        return at.Table(data)
 
     def plot_tabs(self, show=False, **kwargs):
         """Plot the LDCs in a tabbed figure
@@ -378,14 +632,19 @@ class LDC:
         for n, row in enumerate(self.results):
             self.results[n]['name'] = row['profile']
 
+        # Group the rows by wavelength bin with a single stable sort
+        results = self.results[np.argsort(self.results['wave_eff'], kind='stable')]
+        waves, starts = np.unique(results['wave_eff'], return_index=True)
+        ends = np.append(starts[1:], len(results))
+
         # Draw a figure for each wavelength bin
         tabs = []
-        for wav in np.unique(self.results['wave_eff']):
+        for wav, start, end in zip(waves, starts, ends):
 
             # Plot it
             TOOLS = 'box_zoom, box_select, crosshair, reset, hover'
             fig = bkp.figure(tools=TOOLS, x_range=Range1d(0, 1), y_range=Range1d(0, 1), plot_width=800, plot_height=400)
-            self.plot(wave_eff=wav, fig=fig)
+            self._plot_table(results[start:end], fig=fig)
 
             # Plot formatting
             fig.legend.location = 'bottom_right'
@@ -422,26 +681,73 @@ class LDC:
         # Filter the table by given kwargs
         table = utils.filter_table(self.results, **pwargs)
 
-        for row in table:
+        # Draw the rows
+        fig = self._plot_table(table, fig=fig, **kwargs)
+
+        if show:
+            if _is_mpl_figure(fig):
+                import matplotlib.pyplot as plt
+                plt.xlabel('$\mu$')
+                plt.ylabel('$I(\mu)/I(\mu = 1)$')
+                plt.legend(loc=0, frameon=False)
+                plt.show()
+            else:
+                bkp.show(fig)
+
+        else:
+            return fig
+
+    def _plot_table(self, table, fig=None, **kwargs):
+        """Plot the LDCs in the given rows of the results table
+
+        Parameters
+        ----------
+        table: astropy.table.Table
+            The rows of the results table to plot
+        fig: matplotlib.pyplot.figure, bokeh.plotting.figure (optional)
+            An existing figure to plot on
+
+        Returns
+        -------
+        matplotlib.pyplot.figure, bokeh.plotting.figure
+            The figure
+        """
+        # The smooth curves of every row share the same mu grid
+        mu_vals = np.linspace(0, 1, 1000)
+        curves, dn_errs, up_errs = np.empty((3, len(table), mu_vals.size))
+        source = None
+
+        # Set the matplotlib plot style
+        if _is_mpl_figure(fig):
+            from matplotlib import rc
+            rc('font', **{'family': 'sans-serif', 'sans-serif': ['Helvetica'], 'size': 16})
+            rc('text', usetex=True)
+
+        # Generate the smooth curves and errors of all the rows of each
+        # profile at once, with a 3 sigma band comparable to the envelope
+        # of the 1000 sample bootstrap
+        ldfuncs = list(table['ldfunc'])
+        for ldfunc in set(ldfuncs):
+            rows = [n for n, func in enumerate(ldfuncs) if func is ldfunc]
+            coeffs = np.array([table['coeffs'][n] for n in rows])
+            errors = np.array([table['errors'][n] for n in rows])
+            basis = _LDBasis(ldfunc, mu_vals)
+            curves[rows] = basis.apply(coeffs)
+            dn_errs[rows], up_errs[rows] = self.propagated_errors(mu_vals, ldfunc, coeffs, errors, n_sigma=3, basis=basis)
+
+        for n, row in enumerate(table):
 
             # Set color and label for plot
             color = row['color']
             label = row['name']
-
-            # Generate smooth curve
-            ldfunc = row['ldfunc']
-            mu_vals = np.linspace(0, 1, 1000)
-            ld_vals = ldfunc(mu_vals, *row['coeffs'])
-
-            # Generate smooth errors
-            dn_err, up_err = self.bootstrap_errors(mu_vals, ldfunc, row['coeffs'], row['errors'])
+            ld_vals, dn_err, up_err = curves[n], dn_errs[n], up_errs[n]
 
             # Matplotlib fig by default
             if fig is None:
                 fig = bkp.figure()
 
             # Add fits to matplotlib
-            if isinstance(fig, matplotlib.figure.Figure):
+            if _is_mpl_figure(fig):
 
                 # Make axes
                 ax = fig.add_subplot(111)
@@ -474,23 +780,19 @@ class LDC:
                 # Plot the mu cutoff
                 fig.line([row['mu_min']] * 2, [0, 1], legend_label='cutoff', line_color='#6b6ecf', line_dash='dotted')
 
-                # Draw the curve and error
-                fig.line(mu_vals, ld_vals, line_color=color, legend_label=label, **kwargs)
-                vals = np.append(mu_vals, mu_vals[::-1])
-                evals = np.append(dn_err, up_err[::-1])
-                fig.patch(vals, evals, color=color, fill_alpha=0.2, line_alpha=0)
+                # Add the curve and error to the data source shared by all rows
+                if source is None:
+                    source = ColumnDataSource(data={'mu': mu_vals})
+                ld_col, dn_col, up_col = ['{}{}'.format(col, n) for col in ['ld', 'dn', 'up']]
+                source.add(ld_vals, ld_col)
+                source.add(dn_err, dn_col)
+                source.add(up_err, up_col)
 
-        if show:
-            if isinstance(fig, matplotlib.figure.Figure):
-                plt.xlabel('$\mu$')
-                plt.ylabel('$I(\mu)/I(\mu = 1)$')
-                plt.legend(loc=0, frameon=False)
-                plt.show()
-            else:
-                bkp.show(fig)
+                # Draw the curve and error
+                fig.line('mu', ld_col, source=source, line_color=color, legend_label=label, **kwargs)
+                fig.varea('mu', dn_col, up_col, source=source, fill_color=color, fill_alpha=0.2)
 
-        else:
-            return fig
+        return fig
 
     def save(self, filepath):
         """
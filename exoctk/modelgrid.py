@@ -329,13 +329,12 @@ class ModelGrid(object):
                 # Convert from A to desired units
                 raw_wave *= self.const
 
-                # Janky unit nullification
-                def toQ(val):
-                    return val if hasattr(val, 'unit') else val * self.wave_units
+                # Convert the wavelength range to plain floats in the
+                # wavelength units so the whole array is never made a Quantity
+                wave_min, wave_max = [q.Quantity(val, self.wave_units).value for val in self.wave_rng[:2]]
 
                 # Trim the wavelength and flux arrays
-                idx, = np.where(np.logical_and(raw_wave * self.wave_units >= toQ(self.wave_rng[0]),
-                                               raw_wave * self.wave_units <= toQ(self.wave_rng[1])))
+                idx, = np.where((raw_wave >= wave_min) & (raw_wave <= wave_max))
                 flux = raw_flux[:, idx]
                 wave = raw_wave[idx]
 
@@ -0,0 +1,39 @@
+#! /usr/bin/env python
+
+"""Tests for the ``groups_integrations`` module.
+
+Use
+---
+
+    These tests can be run via the command line (omit the ``-s`` to
+    suppress verbose output to stdout):
+    ::
+
+        pytest -s test_groups_integrations.py
+"""
+
+from pkg_resources import resource_filename
+
+from exoctk.groups_integrations import groups_integrations as gi
+
+INFILE = resource_filename('exoctk', 'data/groups_integrations/groups_integrations_input_data.json')
+
+
+def test_convert_sat():
+    """Test that a full well fraction is converted to counts"""
+    print('Testing saturation conversion...')
+
+    # Full well fraction
+    assert gi.convert_sat(0.5, 'well', 'niriss', INFILE) == 28000.
+
+    # Counts pass through and TA mode uses the full well
+    assert gi.convert_sat(30000, 'counts', 'niriss', INFILE) == 30000
+    assert gi.convert_sat(0.5, 'well', 'niriss', INFILE, ta=True) == 56000.
+
+
+def test_min_groups():
+    """Test that the minimum number of groups matches the closest magnitude"""
+    print('Testing minimum TA groups...')
+
+    assert gi.min_groups(6.4, 'niriss', 'f480m', 'im', 'k7v', 'k', INFILE) == 3
+    assert gi.min_groups(13, 'niriss', 'f480m', 'im', 'k7v', 'k', INFILE) == 9
@@ -0,0 +1,131 @@
+#! /usr/bin/env python
+
+"""Tests for the ``helpers`` module.
+
+Use
+---
+
+    These tests can be run via the command line (omit the ``-s`` to
+    suppress verbose output to stdout):
+    ::
+
+        pytest -s test_helpers.py
+"""
+
+from astropy.io import ascii, fits
+import astropy.constants as ac
+import astropy.units as q
+import h5py
+import numpy as np
+
+from exoctk import helpers
+
+MUS = [1.0, 0.9, 0.8, 0.7, 0.6, 0.5, 0.4, 0.3, 0.25, 0.2, 0.15, 0.125, 0.1, 0.075, 0.05, 0.025, 0.01]
+
+
+def make_block(teff=4000, logg=4.5, feh=-0.5, n_wave=20, seed=0):
+    """Make a synthetic ATLAS9 block in the Kurucz F9.2,1PE10.3,16I6 layout"""
+    rng = np.random.default_rng(seed)
+    header = 'TEFF   {}.  GRAVITY {:.5f} LTE TITLE [{:+.1f}] VTURB 2.0 L/H MIXLEN 1.25\n'.format(teff, logg, feh)
+    lines = [' junk line\n', ' ' + ' '.join('{:.3f}'.format(m) for m in MUS) + '\n']
+    for wl in np.linspace(100, 2000, n_wave):
+        ratios = np.sort(rng.integers(1000, 99999, len(MUS) - 1))[::-1]
+        lines.append('{:9.2f}{:10.3E}'.format(wl, rng.uniform(1E3, 1E6)) + ''.join('{:6d}'.format(r) for r in ratios) + '\n')
+    lines += ['trailer\n'] * 4
+
+    return header, lines
+
+
+def make_atlas9_file(tmp_path):
+    """Write a synthetic ATLAS9 file with two good blocks and a malformed one"""
+    text = ''
+    for n, (teff, logg) in enumerate([(4000, 4.5), (4250, 4.0), (4000, 4.0)]):
+        header, lines = make_block(teff, logg, seed=n)
+
+        # Corrupt an intensity ratio of the last block
+        if n == 2:
+            lines[5] = lines[5][:25] + 'xxxxxx' + lines[5][31:]
+
+        text += header + ''.join(lines)
+
+    filepath = tmp_path / 'atlas.pck'
+    filepath.write_text(text)
+
+    return str(filepath)
+
+
+def parse_block_ascii(lines):
+    """Parse the data of a block the way the original ascii.read parser did"""
+    data = [l[:19] + ' ' + ' '.join([l[idx:idx + 6] for idx in np.arange(19, len(l), 6)]) for l in lines[2:-4]]
+    cols = ['wl'] + lines[1].strip().split()
+    data = ascii.read(data, names=cols)
+    data_cube = np.array([data[cols][n] for n in cols[1:]])[::-1]
+    data_cube[:-1] *= data_cube[-1]
+    data_cube[-1] *= 1E5
+    data_cube = data_cube * q.erg / q.cm**2 / q.s / q.steradian / q.Hz
+    wave = np.array(data['wl']) * q.nm.to(q.AA)
+    data_cube = data_cube * ac.c / (wave**2) * q.steradian / q.cm**2
+    data_cube = data_cube.to(q.erg / q.s / q.cm**3) * 1E16
+
+    return wave, data_cube.value
+
+
+def test_parse_block():
+    """Test that the fixed-width parser matches the ascii.read parser"""
+    print('Testing ATLAS9 block parsing...')
+
+    header, lines = make_block()
+    block = helpers._parse_block(header, lines)
+    wave, flux = parse_block_ascii(lines)
+
+    assert block['teff'] == 4000 and block['logg'] == 4.5 and block['feh'] == -0.5
+    assert np.allclose(block['mu'], MUS[::-1])
+    assert np.allclose(block['wave'], wave, rtol=1e-6)
+    assert np.allclose(block['flux'], flux, rtol=1e-6)
+
+
+def test_convert_atlas9(tmp_path):
+    """Test that ATLAS9 blocks are split into files and malformed blocks skipped"""
+    print('Testing ATLAS9 conversion to separate files...')
+
+    filepath = make_atlas9_file(tmp_path)
+    helpers.convert_ATLAS9(filepath, destination=str(tmp_path) + '/', processes=1)
+
+    # The malformed 4000/4.0 block is skipped
+    files = sorted(f.name for f in tmp_path.glob('ATLAS9_*.fits'))
+    assert files == ['ATLAS9_4000_45_m05.fits', 'ATLAS9_4250_40_m05.fits']
+
+    wave, flux = parse_block_ascii(make_block(4000, 4.5, seed=0)[1])
+    with fits.open(str(tmp_path / 'ATLAS9_4000_45_m05.fits')) as hdu:
+        assert hdu[0].header['PHXTEFF'] == 4000
+        assert np.allclose(hdu[0].data, flux, rtol=1e-6)
+        assert np.allclose(hdu['WAVELENGTH'].data, wave, rtol=1e-6)
+
+
+def test_convert_atlas9_single_file(tmp_path):
+    """Test that ATLAS9 blocks are bundled into one FITS and one HDF5 file"""
+    print('Testing ATLAS9 conversion to bundled files...')
+
+    filepath = make_atlas9_file(tmp_path)
+    helpers.convert_ATLAS9(filepath, destination=str(tmp_path) + '/', processes=1, single_file=True, hdf5=True)
+
+    # No separate files are written
+    assert not list(tmp_path.glob('ATLAS9_4*.fits'))
+
+    wave, flux = parse_block_ascii(make_block(4250, 4.0, seed=1)[1])
+
+    # One extension per good block
+    with fits.open(str(tmp_path / 'ATLAS9_atlas.fits')) as hdu:
+        index = hdu['INDEX'].data
+        assert list(index['teff']) == [4000, 4250]
+        ext = index['ext_index'][index['teff'] == 4250][0]
+        assert np.allclose(hdu[ext].data, flux, rtol=1e-6)
+        assert np.allclose(hdu['WAVELENGTH'].data, wave, rtol=1e-6)
+
+    # A (Teff, log(g), Fe/H) hypercube with NaNs at the missing grid points
+    with h5py.File(str(tmp_path / 'ATLAS9_atlas.hdf5'), 'r') as f:
+        assert list(f['Teff'][:]) == [4000, 4250]
+        assert list(f['logg'][:]) == [4.0, 4.5]
+        assert f['flux'].shape == (2, 2, 1, len(MUS), 20)
+        assert np.allclose(f['flux'][1, 0, 0], flux, rtol=1e-6)
+        assert np.isnan(f['flux'][0, 0, 0]).all()
@@ -20,6 +20,7 @@ Use
 import os
 from pkg_resources import resource_filename
 
+import numpy as np
 from svo_filters import Filter
 
 from exoctk import modelgrid as mg
@@ -113,6 +114,43 @@ def test_ldc_calculation_grism():
     assert len(ld_session.results) == 20
 
 
+def test_ldc_calculation_profiles():
+    """Test to see if several profiles can be calculated in one call and
+    that they are appended to the results table in order"""
+    print('Testing LDC calculation of several profiles at once...')
+
+    # Make the session
+    ld_session = ldf.LDC(MODELGRID)
+
+    # Make a filter
+    filt = Filter('2MASS.H', n_bins=10)
+
+    # Run the calculations
+    ld_session.calculate(Teff=4000, logg=4.5, FeH=0, profile=['quadratic', '4-parameter'],
+                         bandpass=filt)
+
+    # Two profiles split into 10 measurements = 20 calculations
+    assert len(ld_session.results) == 20
+    assert list(ld_session.results['profile']) == ['quadratic'] * 10 + ['4-parameter'] * 10
+
+
+def test_ldc_calculation_long_strings():
+    """Test that names and paths longer than the initial column width
+    are not truncated in the results table"""
+    print('Testing LDC calculation with long names...')
+
+    # Make the session
+    ld_session = ldf.LDC(MODELGRID)
+
+    # Run the calculations
+    name = 'A calculation with a long name'
+    ld_session.calculate(Teff=4000, logg=4.5, FeH=0, profile='quadratic')
+    ld_session.calculate(Teff=4000, logg=4.5, FeH=0, profile='quadratic', name=name)
+
+    assert ld_session.results['name'][-1] == name
+    assert ld_session.results['models'][-1] == MODELGRID.path
+
+
 def test_ldc_calculation_interpolation():
     """Test to see if a calculation can be performed with no filter and
     an interpolated grid point and that they are appended to the results
@@ -134,3 +172,60 @@ def test_ldc_calculation_interpolation():
     ld_session.calculate(Teff=4023, logg=4.1, FeH=-0.1, profile='quadratic')
 
     assert len(ld_session.results) == 7
+
+
+def test_ld_linear_fit():
+    """Test that the linear least-squares fit recovers the coefficients
+    of a limb darkening profile"""
+    print('Testing linear limb darkening profile fit...')
+
+    # Make a noiseless profile
+    mu = np.linspace(0.05, 1, 50)
+    ldfunc = ldf.ld_profile('4-parameter')
+    coeffs = [0.5, 0.2, -0.1, 0.05]
+    ld = ldfunc(mu, *coeffs)
+
+    # Fit it
+    X, offset = ldf._design_matrix(ldfunc, mu)
+    fit, cov = ldf._fit_linear(X, ld - offset)
+
+    assert np.allclose(fit, coeffs)
+    assert cov.shape == (4, 4)
+
+
+def test_ld_propagated_errors():
+    """Test that the analytic LDC errors match the scatter of sampled
+    coefficients"""
+    print('Testing propagated limb darkening errors...')
+
+    mu = np.linspace(0.05, 1, 50)
+    ldfunc = ldf.ld_profile('quadratic')
+    coeffs, errors = np.array([0.3, 0.1]), np.array([0.02, 0.01])
+
+    # Sample the profile
+    samples = np.random.default_rng(42).normal(coeffs, errors, size=(20000, 2))
+    sampled_std = np.std(ldfunc(mu[None, :], *samples.T[:, :, None]), axis=0)
+
+    dn_err, up_err = ldf.LDC.propagated_errors(mu, ldfunc, coeffs, errors)
+
+    assert np.allclose((up_err - dn_err) / 2, sampled_std, rtol=0.05)
+
+
+def test_ld_bootstrap_errors_nonlinear():
+    """Test that the bootstrap errors evaluate profiles that are not
+    linear in their coefficients directly"""
+    print('Testing bootstrap errors of a nonlinear profile...')
+
+    mu = np.linspace(0.05, 1, 5)
+    coeffs, errors = [2.], [0.1]
+
+    # A nonlinear profile and one with variable arguments
+    for ldfunc in [lambda m, c1: np.exp(-c1 * m), lambda m, *c: np.exp(-c[0] * m)]:
+        dn_err, up_err = ldf.LDC.bootstrap_errors(mu, ldfunc, coeffs, errors, rng=np.random.default_rng(42))
+
+        # Compare to evaluating the profile for each sample
+        samples = np.random.default_rng(42).normal(coeffs, errors, size=(1000, 1))
+        vals = np.array([ldfunc(mu, *sample) for sample in samples])
+
+        assert np.allclose(dn_err, vals.min(axis=0))
+        assert np.allclose(up_err, vals.max(axis=0))
@@ -15,7 +15,6 @@ import urllib
 from astropy.io import fits
 import bokeh.palettes as bpal
 from scipy.interpolate import RegularGridInterpolator
-import matplotlib.pyplot as plt
 import numpy as np
 from svo_filters import svo
 
@@ -532,7 +531,7 @@ def find_closest(axes, points, n=1, values=False):
     Parameters
     ----------
     axes: list, np.array
-        The array(s) to search
+        The sorted array(s) to search
     points: array-like, float
         The point(s) to search for
     n: int
@@ -548,8 +547,10 @@ def find_closest(axes, points, n=1, values=False):
         points = [points]
 
     for i, (axis, point) in enumerate(zip(axes, points)):
-        if point >= min(axis) and point <= max(axis):
-            axis = np.asarray(axis)
+
+        # The axis must be sorted to search it, so the ends are the bounds
+        axis = np.asarray(axis)
+        if point >= axis[0] and point <= axis[-1]:
             idx = np.clip(axis.searchsorted(point), 1, len(axis)-1)
             slc = slice(max(0, idx-n), min(idx+n, len(axis)))
 
@@ -557,7 +558,7 @@ def find_closest(axes, points, n=1, values=False):
                 result = axis[slc]
             else:
 
-                result = np.arange(0, len(axis))[slc].astype(int)
+                result = np.arange(slc.start, slc.stop, dtype=int)
 
             results.append(result)
         else: